@@ -1,13 +1,28 @@
+import sys
 from datetime import datetime
 from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, TypeVar
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # optional, difflib is used when it is not installed
+    fuzz = None
+    process = None
 
 Attachment = dict[str, dict]
 Transaction = dict[str, dict]
+Item = TypeVar("Item")
+Other = TypeVar("Other")
 
 
 # --------- Reference handling ----------------
 
 
+# spaces, tabs and the no-break spaces that show up in copied references
+_REF_STRIP = str.maketrans("", "", " \t\u00a0\u2007\u202f")
+
+
 def normalize_ref(ref):
     """Normalize reference numbers for comparison.
 
@@ -16,12 +31,22 @@ def normalize_ref(ref):
     """
     if not ref:
         return None
-    ref = str(ref).upper()
-    if ref.startswith("RF"):
+    return _normalize_ref_str(str(ref))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_ref_str(ref: str) -> str | None:
+    """Normalize a reference that has already been converted to a string."""
+    # for ASCII only the prefix needs a case-insensitive check, which saves
+    # uppercasing the whole value just to lowercase it again; other text
+    # keeps the upper() pass because e.g. "ß".upper().lower() is "ss"
+    if not ref.isascii():
+        ref = ref.upper()
+    if ref[:2] in ("RF", "Rf", "rF", "rf"):
         ref = ref[2:]
-    ref = ref.replace(" ", "")
-    ref = ref.lstrip("0")
-    return ref.lower() or None
+    ref = ref.translate(_REF_STRIP).lstrip("0").lower()
+    # interned so equal references share one object and compare by identity
+    return sys.intern(ref) if ref else None
 
 
 def get_transaction_reference(transaction: Transaction) -> str | None:
@@ -81,6 +106,10 @@ def get_attachment_date(attachment: Attachment) -> datetime | None:
     return parse_date(date_str)
 
 
+# checked in order and at most one suffix is removed per name
+_COMPANY_SUFFIXES = (" oyj", " oy", " ab", " tmi")
+
+
 def normalize_name(name: str | None) -> str | None:
     """Normalize a party name for comparison.
 
@@ -88,11 +117,18 @@ def normalize_name(name: str | None) -> str | None:
     """
     if not name:
         return None
-    s = name.strip().lower()
-    # strip common Finnish company suffixes
-    for suffix in (" oyj", " oy", " ab", " tmi"):
-        if s.endswith(suffix):
-            s = s[: -len(suffix)].strip()
+    return _strip_company_suffix(name.strip().lower())
+
+
+@lru_cache(maxsize=4096)
+def _strip_company_suffix(s: str) -> str | None:
+    """Remove common Finnish company suffixes from a lowercased name."""
+    for suffix in _COMPANY_SUFFIXES:
+        stripped = s.removesuffix(suffix)
+        # removesuffix returns the same object when nothing was removed
+        if stripped is not s:
+            s = stripped.rstrip()
+            break
     return s or None
 
 
@@ -102,6 +138,9 @@ def get_transaction_name(transaction: Transaction) -> str | None:
     return normalize_name(transaction.get("contact"))  # type: ignore[return-value]
 
 
+_ACCOUNT_OWNER = normalize_name("Example Company Oy")
+
+
 def get_attachment_counterparty(attachment: Attachment) -> str | None:
     """Return the normalized counterparty name from an attachment.
 
@@ -109,29 +148,28 @@ def get_attachment_counterparty(attachment: Attachment) -> str | None:
     Example Company Oy, which is the account owner.
     """
     data = attachment.get("data") or {}
-    issuer = normalize_name(data.get("issuer"))
-    recipient = normalize_name(data.get("recipient"))
-    supplier = normalize_name(data.get("supplier"))
-
-    company = normalize_name("Example Company Oy")
-
-    candidates = [n for n in (issuer, recipient, supplier) if n and n != company]
-    return candidates[0] if candidates else None
+    # the first name that is not the account owner wins
+    for key in ("issuer", "recipient", "supplier"):
+        name = normalize_name(data.get(key))
+        if name and name != _ACCOUNT_OWNER:
+            return name
+    return None
 
 
 # ------------- Scoring ----------------
 
 
-def amount_score(transaction: Transaction, attachment: Attachment) -> float:
-    """Score how well the amounts match, based on absolute values."""
-    tx_amount = get_transaction_amount(transaction)
-    att_amount = get_attachment_amount(attachment)
-
+def _amount_score(tx_amount: float | None, att_amount: float | None) -> float:
+    """Score how well two amounts match, based on absolute values."""
     if tx_amount is None or att_amount is None:
         return 0.0
 
     # Compare absolute values (outgoing payments are negative in the statement)
-    diff = abs(abs(tx_amount) - abs(att_amount))
+    return _amount_diff_score(abs(abs(tx_amount) - abs(att_amount)))
+
+
+def _amount_diff_score(diff: float) -> float:
+    """Score an absolute difference between two amounts."""
     if diff < 0.01:
         return 1.0
     if diff <= 1.0:
@@ -139,15 +177,29 @@ def amount_score(transaction: Transaction, attachment: Attachment) -> float:
     return 0.0
 
 
-def date_score(transaction: Transaction, attachment: Attachment) -> float:
-    """Score how close the transaction date is to the attachment date."""
-    tx_date = get_transaction_date(transaction)
-    att_date = get_attachment_date(attachment)
+def amount_score(transaction: Transaction, attachment: Attachment) -> float:
+    """Score how well the amounts match, based on absolute values."""
+    return _amount_score(
+        get_transaction_amount(transaction),
+        get_attachment_amount(attachment),
+    )
+
+
+def _date_ordinal(value: datetime | None) -> int | None:
+    """Return the proleptic Gregorian day number of a date, or None."""
+    return value.toordinal() if value is not None else None
 
-    if tx_date is None or att_date is None:
+
+def _date_score_ord(tx_ord: int | None, att_ord: int | None) -> float:
+    """Score how close two dates given as day ordinals are to each other."""
+    if tx_ord is None or att_ord is None:
         return 0.0
 
-    days = abs((tx_date - att_date).days)
+    return _date_diff_score(abs(tx_ord - att_ord))
+
+
+def _date_diff_score(days: int) -> float:
+    """Score a gap in days between two dates."""
     if days <= 2:
         return 1.0
     if days <= 5:
@@ -159,22 +211,49 @@ def date_score(transaction: Transaction, attachment: Attachment) -> float:
     return 0.0
 
 
-def name_score(transaction: Transaction, attachment: Attachment) -> float:
-    """Return a similarity-based name score in [0, 1].
+def date_score(transaction: Transaction, attachment: Attachment) -> float:
+    """Score how close the transaction date is to the attachment date."""
+    return _date_score_ord(
+        _date_ordinal(get_transaction_date(transaction)),
+        _date_ordinal(get_attachment_date(attachment)),
+    )
+
 
-    Uses SequenceMatcher on normalized names. A strict threshold keeps
-    small differences like typos weaker than an exact match.
+def _name_similarity(tx_name: str, att_name: str) -> float:
+    """Return the similarity ratio of two names, or 0.0 when below 0.90.
+
+    Uses rapidfuzz when it is installed and difflib otherwise.
     """
-    tx_name = get_transaction_name(transaction)
-    att_name = get_attachment_counterparty(attachment)
+    if fuzz is not None:
+        # score_cutoff lets rapidfuzz give up as soon as 90 is out of reach
+        return fuzz.ratio(tx_name, att_name, score_cutoff=90) / 100.0
+
+    # ratio() is 2*M/T with at most min(la, lb) matching characters, so
+    # the lengths alone can rule out 0.90 before building a matcher
+    # (this is what real_quick_ratio() computes)
+    la, lb = len(tx_name), len(att_name)
+    if la + lb == 0 or 2.0 * min(la, lb) / (la + lb) < 0.90:
+        return 0.0
 
+    # quick_ratio() is a cheaper upper bound of ratio() as well
+    matcher = SequenceMatcher(None, tx_name, att_name, autojunk=False)
+    if matcher.quick_ratio() < 0.90:
+        return 0.0
+    return matcher.ratio()
+
+
+def _name_score(tx_name: str | None, att_name: str | None) -> float:
+    """Return a similarity-based score in [0, 1] for two normalized names."""
     if not tx_name and not att_name:
         return 0.0
     if not tx_name or not att_name:
         return 0.0
 
-    similarity = SequenceMatcher(None, tx_name, att_name).ratio()
+    return _similarity_score(_name_similarity(tx_name, att_name))
 
+
+def _similarity_score(similarity: float) -> float:
+    """Map a name similarity ratio to the name score ladder."""
     # perfect (or near-perfect) match
     if similarity >= 0.98:
         return 1.0
@@ -186,91 +265,192 @@ def name_score(transaction: Transaction, attachment: Attachment) -> float:
     return 0.0
 
 
-def match_score(transaction: Transaction, attachment: Attachment) -> float:
-    """Heuristic score for pairs without reference numbers.
+def name_score(transaction: Transaction, attachment: Attachment) -> float:
+    """Return a similarity-based name score in [0, 1].
 
-    Amount, date and name must all support the link.
-    Amount and date are hard requirements, and if both sides have names
-    the name score must also be positive.
-    This follows the idea
-    that none of these signals alone is enough for a confident match.
+    Uses rapidfuzz (or SequenceMatcher) on normalized names. A strict
+    threshold keeps small differences like typos weaker than an exact match.
     """
-    a = amount_score(transaction, attachment)
-    d = date_score(transaction, attachment)
-    n = name_score(transaction, attachment)
+    return _name_score(
+        get_transaction_name(transaction),
+        get_attachment_counterparty(attachment),
+    )
+
 
-    tx_name = get_transaction_name(transaction)
-    att_name = get_attachment_counterparty(attachment)
-    has_both_names = bool(tx_name and att_name)
+def _score(
+    tx_amount: float | None,
+    tx_ord: int | None,
+    tx_name: str | None,
+    att_amount: float | None,
+    att_ord: int | None,
+    att_name: str | None,
+) -> float:
+    """Heuristic score computed from already extracted fields.
+
+    See match_score for the rules.
+    """
+    # cheapest checks first, so most pairs never reach the name comparison
 
     # amount is a hard requirement
+    a = _amount_score(tx_amount, att_amount)
     if a < 1.0:
         return 0.0
 
     # date must give at least some signal
+    d = _date_score_ord(tx_ord, att_ord)
     if d <= 0.0:
         return 0.0
 
+    # without a name on both sides there is nothing to compare,
+    # so the pair is scored on amount and date alone
+    if not tx_name or not att_name:
+        return _combine_amount_date(a, d)
+
+    return _combine_scores(a, d, _name_score(tx_name, att_name))
+
+
+def _combine_amount_date(a: float, d: float) -> float:
+    """Combine passed amount and date scores for a pair without two names."""
+    return 3.0 * a + 3.0 * d
+
+
+def _combine_scores(a: float, d: float, n: float) -> float:
+    """Combine passed amount and date scores with the score of two names."""
     # when both names exist they must agree (n > 0)
-    if has_both_names and n <= 0.0:
+    if n <= 0.0:
         return 0.0
 
     # combine the three equally
-    return 3.0 * a + 3.0 * d + 3.0 * n
+    return _combine_amount_date(a, d) + 3.0 * n
 
 
-# ---------- Main matching functions ---------------------------
+def match_score(transaction: Transaction, attachment: Attachment) -> float:
+    """Heuristic score for pairs without reference numbers.
+
+    Amount, date and name must all support the link.
+    Amount and date are hard requirements, and if both sides have names
+    the name score must also be positive.
+    This follows the idea
+    that none of these signals alone is enough for a confident match.
+    """
+    _, tx_amount, tx_ord, tx_name = _prep_transaction(transaction)
+    _, att_amount, att_ord, att_name = _prep_attachment(attachment)
+    return _score(tx_amount, tx_ord, tx_name, att_amount, att_ord, att_name)
 
 
-def find_attachment(
-    transaction: Transaction,
+# ---------- Preparation ---------------------------
+#
+# The matching loops compare one item against a whole list, so the fields
+# of every item are extracted and normalized once up front instead of once
+# per compared pair.
+
+PreparedFields = tuple[str | None, float | None, int | None, str | None]
+
+
+def _prep_transaction(transaction: Transaction) -> PreparedFields:
+    """Return (reference, amount, date ordinal, name) for a transaction."""
+    return (
+        get_transaction_reference(transaction),
+        get_transaction_amount(transaction),
+        _date_ordinal(get_transaction_date(transaction)),
+        get_transaction_name(transaction),
+    )
+
+
+def _prep_attachment(attachment: Attachment) -> PreparedFields:
+    """Return (reference, amount, date ordinal, counterparty) for an attachment."""
+    return (
+        get_attachment_reference(attachment),
+        get_attachment_amount(attachment),
+        _date_ordinal(get_attachment_date(attachment)),
+        get_attachment_counterparty(attachment),
+    )
+
+
+def _prep_transactions(
+    transactions: list[Transaction],
+) -> list[tuple[Transaction, PreparedFields]]:
+    """Pair every transaction with its prepared fields."""
+    return [(tx, _prep_transaction(tx)) for tx in transactions]
+
+
+def _prep_attachments(
     attachments: list[Attachment],
-) -> Attachment | None:
-    """Find the best matching attachment for a given transaction.
+) -> list[tuple[Attachment, PreparedFields]]:
+    """Pair every attachment with its prepared fields."""
+    return [(att, _prep_attachment(att)) for att in attachments]
+
+
+# ---------- Indexes ---------------------------
+
+AttachmentIndex = tuple[
+    dict[str, list[Attachment]],
+    list[tuple[Attachment, PreparedFields]],
+]
+TransactionIndex = tuple[
+    dict[str, list[Transaction]],
+    list[tuple[Transaction, PreparedFields]],
+]
+
+
+def _split_by_reference(
+    prepared: list[tuple[Item, PreparedFields]],
+) -> tuple[dict[str, list[Item]], list[tuple[Item, PreparedFields]]]:
+    """Group prepared items by reference and collect those without one."""
+    ref_index: dict[str, list[Item]] = {}
+    no_ref: list[tuple[Item, PreparedFields]] = []
+    for item, fields in prepared:
+        ref = fields[0]
+        if ref is None:
+            no_ref.append((item, fields))
+        else:
+            ref_index.setdefault(ref, []).append(item)
+    return ref_index, no_ref
+
+
+def build_attachment_index(attachments: list[Attachment]) -> AttachmentIndex:
+    """Split attachments into a reference lookup and a heuristic pool.
+
+    Returns a dict from normalized reference to the attachments carrying it,
+    and the prepared attachments without a reference. Build it once and pass
+    it to find_attachment when matching many transactions.
+    """
+    return _split_by_reference(_prep_attachments(attachments))
 
-    First try an exact reference match. If there is no usable reference,
-    fall back to the heuristic based on amount, date and counterparty.
+
+def build_transaction_index(transactions: list[Transaction]) -> TransactionIndex:
+    """Split transactions into a reference lookup and a heuristic pool.
+
+    Mirror of build_attachment_index, for use with find_transaction.
     """
-    # 1) reference-based matching
-    tx_ref = get_transaction_reference(transaction)
-    if tx_ref is not None:
-        ref_matches: list[Attachment] = []
-        for attachment in attachments:
-            att_ref = get_attachment_reference(attachment)
-            if att_ref is None:
-                continue
-            if att_ref == tx_ref:
-                ref_matches.append(attachment)
+    return _split_by_reference(_prep_transactions(transactions))
 
-        if len(ref_matches) == 1:
-            return ref_matches[0]
-        if len(ref_matches) > 1:
-            # ambiguous reference -> safer to skip
-            return None
 
-    # 2) heuristic fallback (amount + date + name),
-    #    only when both sides do not have a reference
-    best: Attachment | None = None
-    best_score = 0.0
-    second_best = 0.0
+# ---------- Main matching functions ---------------------------
 
-    for attachment in attachments:
-        att_ref = get_attachment_reference(attachment)
 
-        if tx_ref is not None or att_ref is not None:
-            continue
+THRESHOLD = 3.5
+MARGIN = 1.0
 
-        score = match_score(transaction, attachment)
+
+def _select_best(scored: Iterable[tuple[Item, float]]) -> Item | None:
+    """Return the top scored candidate if it is a confident match.
+
+    The best score must reach THRESHOLD and beat the second best by at
+    least MARGIN, otherwise the match is considered uncertain.
+    """
+    best: Item | None = None
+    best_score = 0.0
+    second_best = 0.0
+
+    for item, score in scored:
         if score > best_score:
             second_best = best_score
             best_score = score
-            best = attachment
+            best = item
         elif score > second_best:
             second_best = score
 
-    THRESHOLD = 3.5
-    MARGIN = 1.0
-
     if best is None:
         return None
     if best_score < THRESHOLD:
@@ -281,9 +461,52 @@ def find_attachment(
     return best
 
 
+def find_attachment(
+    transaction: Transaction,
+    attachments: list[Attachment],
+    index: AttachmentIndex | None = None,
+) -> Attachment | None:
+    """Find the best matching attachment for a given transaction.
+
+    First try an exact reference match. If there is no usable reference,
+    fall back to the heuristic based on amount, date and counterparty.
+    A prebuilt index from build_attachment_index can be passed to skip
+    preparing the attachments again.
+    """
+    # 1) reference-based matching
+    tx_ref = get_transaction_reference(transaction)
+    if tx_ref is not None:
+        if index is not None:
+            ref_matches = index[0].get(tx_ref, ())
+        else:
+            # only the references are needed here, so the other fields of
+            # the attachments are not prepared
+            ref_matches = [
+                attachment
+                for attachment in attachments
+                if get_attachment_reference(attachment) == tx_ref
+            ]
+        if len(ref_matches) == 1:
+            return ref_matches[0]
+        # no match or an ambiguous reference -> safer to skip, the
+        # heuristic is only used when both sides lack a reference
+        return None
+
+    # 2) heuristic fallback (amount + date + name)
+    _, tx_amount, tx_ord, tx_name = _prep_transaction(transaction)
+    _, no_ref = index or build_attachment_index(attachments)
+    # no_ref holds only attachments without a reference, and candidates are
+    # scored as _select_best consumes them, in a single pass
+    return _select_best(
+        (attachment, _score(tx_amount, tx_ord, tx_name, att_amount, att_ord, att_name))
+        for attachment, (_, att_amount, att_ord, att_name) in no_ref
+    )
+
+
 def find_transaction(
     attachment: Attachment,
     transactions: list[Transaction],
+    index: TransactionIndex | None = None,
 ) -> Transaction | None:
     """Find the best matching transaction for a given attachment.
 
@@ -292,47 +515,217 @@ def find_transaction(
     # 1) reference-based matching
     att_ref = get_attachment_reference(attachment)
     if att_ref is not None:
-        ref_matches: list[Transaction] = []
-        for transaction in transactions:
-            tx_ref = get_transaction_reference(transaction)
-            if tx_ref is None:
-                continue
-            if tx_ref == att_ref:
-                ref_matches.append(transaction)
-
+        if index is not None:
+            ref_matches = index[0].get(att_ref, ())
+        else:
+            ref_matches = [
+                transaction
+                for transaction in transactions
+                if get_transaction_reference(transaction) == att_ref
+            ]
         if len(ref_matches) == 1:
             return ref_matches[0]
-        if len(ref_matches) > 1:
-            return None
+        return None
 
     # 2) heuristic fallback, again only when both sides lack references
-    best: Transaction | None = None
-    best_score = 0.0
-    second_best = 0.0
+    _, att_amount, att_ord, att_name = _prep_attachment(attachment)
+    _, no_ref = index or build_transaction_index(transactions)
+    return _select_best(
+        (transaction, _score(tx_amount, tx_ord, tx_name, att_amount, att_ord, att_name))
+        for transaction, (_, tx_amount, tx_ord, tx_name) in no_ref
+    )
 
-    for transaction in transactions:
-        tx_ref = get_transaction_reference(transaction)
 
-        if att_ref is not None or tx_ref is not None:
+# ---------- Batch matching ---------------------------
+
+
+def score_matrix(
+    tx_amts: list[float | None],
+    tx_ords: list[int | None],
+    att_amts: list[float | None],
+    att_ords: list[int | None],
+) -> tuple[list[list[float]], list[list[float]]]:
+    """Return amount and date scores for every transaction/attachment pair.
+
+    Rows follow the transactions and columns follow the attachments. The
+    inputs are the prepared columns of both sides, so no dict access or
+    parsing happens per pair.
+    """
+    # The per-pair work is kept to one subtraction and the score ladder:
+    # absolute amounts are taken once per item, and items with a missing
+    # value get a whole row (or column) of zeros without any pair checks.
+    zeros = [0.0] * len(att_amts)
+    att_abs = [abs(aa) if aa is not None else None for aa in att_amts]
+    att_cols = [col for col, aa in enumerate(att_abs) if aa is not None]
+    a_scores: list[list[float]] = []
+    for ta in tx_amts:
+        row = zeros.copy()
+        if ta is not None:
+            ta = abs(ta)
+            for col in att_cols:
+                row[col] = _amount_diff_score(abs(ta - att_abs[col]))
+        a_scores.append(row)
+
+    ord_cols = [col for col, ao in enumerate(att_ords) if ao is not None]
+    d_scores: list[list[float]] = []
+    for to in tx_ords:
+        row = zeros.copy()
+        if to is not None:
+            for col in ord_cols:
+                row[col] = _date_diff_score(abs(to - att_ords[col]))
+        d_scores.append(row)
+
+    return a_scores, d_scores
+
+
+def _name_scores(
+    tx_name: str | None,
+    att_names: dict[int, str | None],
+) -> dict[int, float]:
+    """Score one name against several, keyed like att_names.
+
+    Names scoring 0 are left out of the result.
+    """
+    if not tx_name:
+        return {}
+    if process is not None:
+        # one C++ call for the whole row instead of one per pair; processor
+        # is passed explicitly because older rapidfuzz versions default to
+        # utils.default_process here, which fuzz.ratio does not apply
+        matches = process.extract(
+            tx_name,
+            att_names,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=90,
+            limit=None,
+        )
+        return {col: _similarity_score(sim / 100.0) for _, sim, col in matches}
+    return {col: _name_score(tx_name, name) for col, name in att_names.items()}
+
+
+def _heuristic_scores(
+    tx_fields: list[PreparedFields],
+    att_fields: list[PreparedFields],
+) -> list[list[float]]:
+    """Return the match_score of every transaction/attachment pair.
+
+    Amount and date are scored for all pairs first, and names are only
+    compared for the pairs that pass both checks.
+    """
+    a_scores, d_scores = score_matrix(
+        [fields[1] for fields in tx_fields],
+        [fields[2] for fields in tx_fields],
+        [fields[1] for fields in att_fields],
+        [fields[2] for fields in att_fields],
+    )
+    rows: list[list[float]] = []
+    for (_, _, _, tx_name), a_row, d_row in zip(tx_fields, a_scores, d_scores):
+        row = [0.0] * len(att_fields)
+        passed = [
+            col
+            for col in range(len(att_fields))
+            if a_row[col] >= 1.0 and d_row[col] > 0.0
+        ]
+        names = _name_scores(tx_name, {col: att_fields[col][3] for col in passed})
+        for col in passed:
+            if tx_name and att_fields[col][3]:
+                row[col] = _combine_scores(a_row[col], d_row[col], names.get(col, 0.0))
+            else:
+                row[col] = _combine_amount_date(a_row[col], d_row[col])
+        rows.append(row)
+    return rows
+
+
+def _match_references(
+    prepared: list[tuple[Item, PreparedFields]],
+    ref_index: dict[str, list[Other]],
+) -> tuple[list[Other | None], list[tuple[int, PreparedFields]]]:
+    """Resolve reference matches for a batch of prepared items.
+
+    Returns the match found for each item, and the position and fields of
+    the items without a reference, which are left to the heuristic.
+    """
+    found: list[Other | None] = [None] * len(prepared)
+    pending: list[tuple[int, PreparedFields]] = []
+    for i, (_, fields) in enumerate(prepared):
+        ref = fields[0]
+        if ref is None:
+            pending.append((i, fields))
             continue
+        ref_matches = ref_index.get(ref, ())
+        if len(ref_matches) == 1:
+            found[i] = ref_matches[0]
+    return found, pending
 
-        score = match_score(transaction, attachment)
-        if score > best_score:
-            second_best = best_score
-            best_score = score
-            best = transaction
-        elif score > second_best:
-            second_best = score
 
-    THRESHOLD = 3.5
-    MARGIN = 1.0
+def _select_per_row(
+    found: list[Item | None],
+    pending: list[tuple[int, PreparedFields]],
+    candidates: list[Item],
+    scores: Iterable[Iterable[float]],
+) -> None:
+    """Store the best candidate for each row of scores in found.
 
-    if best is None:
-        return None
-    if best_score < THRESHOLD:
-        return None
-    if best_score - second_best < MARGIN:
-        return None
+    pending gives the position in found of each row, as returned by
+    _match_references.
+    """
+    for (i, _), row in zip(pending, scores):
+        found[i] = _select_best(zip(candidates, row))
 
-    return best
 
+def match_all(
+    transactions: list[Transaction],
+    attachments: list[Attachment],
+) -> tuple[list[Attachment | None], list[Transaction | None]]:
+    """Match transactions and attachments in both directions at once.
+
+    Returns the find_attachment result for each transaction and the
+    find_transaction result for each attachment. Both sides are prepared
+    once and every heuristic pair is scored only once.
+    """
+    prepared_txs = _prep_transactions(transactions)
+    prepared_atts = _prep_attachments(attachments)
+    tx_ref_index, _ = _split_by_reference(prepared_txs)
+    att_ref_index, _ = _split_by_reference(prepared_atts)
+
+    # 1) reference-based matching
+    found_atts, tx_rows = _match_references(prepared_txs, att_ref_index)
+    found_txs, att_cols = _match_references(prepared_atts, tx_ref_index)
+
+    # 2) heuristic fallback between the items without a reference
+    scores = _heuristic_scores(
+        [fields for _, fields in tx_rows],
+        [fields for _, fields in att_cols],
+    )
+    no_ref_atts = [attachments[j] for j, _ in att_cols]
+    no_ref_txs = [transactions[i] for i, _ in tx_rows]
+    _select_per_row(found_atts, tx_rows, no_ref_atts, scores)
+    _select_per_row(found_txs, att_cols, no_ref_txs, zip(*scores))
+
+    return found_atts, found_txs
+
+
+def find_attachments(
+    transactions: list[Transaction],
+    attachments: list[Attachment],
+) -> list[Attachment | None]:
+    """Find the best matching attachment for each transaction.
+
+    Gives the same result as calling find_attachment per transaction, but
+    prepares the attachments once and scores every heuristic pair in one
+    batch. Unlike match_all, the reverse direction is not computed.
+    """
+    ref_index, no_ref = build_attachment_index(attachments)
+
+    # 1) reference-based matching
+    found, tx_rows = _match_references(_prep_transactions(transactions), ref_index)
+
+    # 2) heuristic fallback for the transactions without a reference
+    scores = _heuristic_scores(
+        [fields for _, fields in tx_rows],
+        [fields for _, fields in no_ref],
+    )
+    _select_per_row(found, tx_rows, [attachment for attachment, _ in no_ref], scores)
+
+    return found
@@ -0,0 +1,102 @@
+"""Check that the batch entry points agree with the per-item functions.
+
+match_all, find_attachments and the prebuilt indexes must give the same
+result as calling find_attachment / find_transaction for each item, with
+and without rapidfuzz installed.
+
+Run from the repository root with: python -m unittest
+"""
+
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import match
+from src.match import (
+    build_attachment_index,
+    build_transaction_index,
+    find_attachment,
+    find_attachments,
+    find_transaction,
+    match_all,
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "src" / "data"
+
+
+def _load(name: str) -> list[dict]:
+    with open(DATA_DIR / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ids(items: list[dict | None]) -> list[int | None]:
+    return [item["id"] if item else None for item in items]
+
+
+class BatchMatchingTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.transactions = _load("transactions.json")
+        self.attachments = _load("attachments.json")
+
+    def _expected_attachments(self) -> list[int | None]:
+        return _ids(
+            [find_attachment(tx, self.attachments) for tx in self.transactions]
+        )
+
+    def _expected_transactions(self) -> list[int | None]:
+        return _ids(
+            [find_transaction(att, self.transactions) for att in self.attachments]
+        )
+
+    def _check_batch(self) -> None:
+        expected_atts = self._expected_attachments()
+        expected_txs = self._expected_transactions()
+
+        found_atts, found_txs = match_all(self.transactions, self.attachments)
+        self.assertEqual(_ids(found_atts), expected_atts)
+        self.assertEqual(_ids(found_txs), expected_txs)
+
+        found_atts = find_attachments(self.transactions, self.attachments)
+        self.assertEqual(_ids(found_atts), expected_atts)
+
+    def _check_index(self) -> None:
+        att_index = build_attachment_index(self.attachments)
+        tx_index = build_transaction_index(self.transactions)
+
+        self.assertEqual(
+            _ids(
+                [
+                    find_attachment(tx, self.attachments, index=att_index)
+                    for tx in self.transactions
+                ]
+            ),
+            self._expected_attachments(),
+        )
+        self.assertEqual(
+            _ids(
+                [
+                    find_transaction(att, self.transactions, index=tx_index)
+                    for att in self.attachments
+                ]
+            ),
+            self._expected_transactions(),
+        )
+
+    def test_batch_matches_per_item(self) -> None:
+        self._check_batch()
+
+    def test_batch_matches_per_item_without_rapidfuzz(self) -> None:
+        with mock.patch.multiple(match, fuzz=None, process=None):
+            self._check_batch()
+
+    def test_index_matches_per_item(self) -> None:
+        self._check_index()
+
+    def test_index_matches_per_item_without_rapidfuzz(self) -> None:
+        with mock.patch.multiple(match, fuzz=None, process=None):
+            self._check_index()
+
+
+if __name__ == "__main__":
+    unittest.main()